@@ -1,18 +1,30 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import atexit
+import gzip
+import time
+import hashlib
+import os
 import threading
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
 from datetime import datetime, timezone, timedelta
+from decimal import Decimal
 from pathlib import Path
+from uuid import uuid4
 
-from flask import Flask, jsonify, request
+import orjson
+
+from flask import Flask, jsonify, request, send_file
+from flask.json.provider import JSONProvider
+from flask_compress import Compress
 from flask_cors import CORS
 
 from scraper.race import (
     AbortScrapeError,
-    build_horse_json,
-    build_jockey_json,
+    build_all,
     scrape_race_data,
+    scrape_race_data_async,
 )
 
 # === Paths ===
@@ -21,40 +33,198 @@ RACE_JSON_PATH = (BASE_DIR.parent / "public" / "server" / "RaceTest.json").resol
 HORSE_JSON_PATH = (BASE_DIR.parent / "public" / "server" / "HorseTest.json").resolve()
 JOCKEY_JSON_PATH = (BASE_DIR.parent / "public" / "server" / "JockeyTest.json").resolve()
 
+# (final, tmp) を import 時に一度だけ確定させ、毎リクエストの Path 生成と
+# mkdir の stat を省く
+WRITE_TARGETS = {
+    key: (p, p.with_suffix(p.suffix + ".tmp"))
+    for key, p in (
+        ("race", RACE_JSON_PATH),
+        ("horse", HORSE_JSON_PATH),
+        ("jockey", JOCKEY_JSON_PATH),
+    )
+}
+for _final, _tmp in WRITE_TARGETS.values():
+    _final.parent.mkdir(parents=True, exist_ok=True)
+
+# tmp ファイルの置き場。KEIBA_STAGE (既定 /dev/shm/keiba) が出力先と同じ
+# ファイルシステム上にある場合のみ使う — rename はデバイスを跨げないため。
+STAGING_DIR = Path(os.environ.get("KEIBA_STAGE", "/dev/shm/keiba"))
+_staging_ok: dict = {}  # parent dir -> bool
+
+
+def _staging_tmp(path: Path, tmp: Path) -> Path:
+    ok = _staging_ok.get(path.parent)
+    if ok is None:
+        try:
+            STAGING_DIR.mkdir(parents=True, exist_ok=True)
+            ok = os.stat(STAGING_DIR).st_dev == os.stat(path.parent).st_dev
+        except OSError:
+            ok = False
+        _staging_ok[path.parent] = ok
+    return STAGING_DIR / (path.name + ".tmp") if ok else tmp
+
 # JST
 JST = timezone(timedelta(hours=9))
 
+
+def _now_iso() -> str:
+    # datetime.now() より軽い time.time() + 固定 tz で JST タイムスタンプを作る
+    return datetime.fromtimestamp(time.time(), JST).isoformat(timespec="seconds")
+
+class ORJSONProvider(JSONProvider):
+    """jsonify() / request.get_json() を orjson (Rust encoder) で処理する。"""
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=_json_default).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 CORS(app)  # React(3000) -> Flask(5000)
+Compress(app)  # JSON レスポンスを gzip/br で圧縮
 
-# Re-entrancy guard
-_lock = threading.Lock()
-_is_running = False
+# Job table: job_id -> {"status": "running"|"ok"|"aborted"|"error", ...}
+# 旧 _is_running の単一 bool だとスレッド死亡時に 409 が恒久化するため per-job 管理にする。
+# 同時実行ガードは lock+bool ではなく semaphore の try-acquire 1回で済ませる。
+# dict の get/set は GIL 下で atomic なので _jobs 自体にロックは不要。
+_run_sem = threading.BoundedSemaphore(1)
+_jobs: dict = {}
 
+# Playwright ブラウザは起動が重い（数秒）ので最初の利用時に1度だけ起動して使い回す。
+# async API を使うため、ブラウザは専用のイベントループスレッド上に常駐させる。
+_pw_lock = threading.Lock()
+_pw_loop = None
 
-def atomic_write_json(path: Path, data: dict) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
+
+def _get_pw_loop() -> asyncio.AbstractEventLoop:
+    global _pw_loop
+    with _pw_lock:
+        if _pw_loop is None:
+            _pw_loop = asyncio.new_event_loop()
+            threading.Thread(target=_pw_loop.run_forever, daemon=True, name="pw-loop").start()
+    return _pw_loop
+
+
+async def _get_browser():
+    browser = app.extensions.get("pw_browser")
+    if browser is None:
+        from playwright.async_api import async_playwright
+
+        pw = await async_playwright().start()
+        browser = await pw.chromium.launch(headless=True)
+        app.extensions["pw_playwright"] = pw
+        app.extensions["pw_browser"] = browser
+
+        def _close():
+            loop = _pw_loop
+            if loop is not None and loop.is_running():
+                asyncio.run_coroutine_threadsafe(browser.close(), loop).result(timeout=10)
+                asyncio.run_coroutine_threadsafe(pw.stop(), loop).result(timeout=10)
+
+        atexit.register(_close)
+    return browser
+
+# エンコードと書き出しで使い回す共有プール。
+# リクエスト毎のスレッド生成コストを避けるため app.extensions に載せる。
+# workers=2 なのは意図的: 3並列だと大きなカードで dict + bytes が全部同時に
+# 生存してピーク RSS が跳ねるため、レイテンシと引き換えに 2 に抑えている。
+app.extensions["executor"] = ThreadPoolExecutor(max_workers=2, thread_name_prefix="update-race")
+
+
+def _json_default(obj):
+    """orjson が直接扱えない型のフォールバック（datetime/Decimal/set など）。"""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# 前回書いた内容の digest（path -> bytes）。一致すればディスク書き込み自体を省く
+_last_digests: dict = {}
+
+
+def _atomic_write_bytes(path: Path, buf: bytes) -> None:
     tmp = path.with_suffix(path.suffix + ".tmp")
-    with tmp.open("w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    with tmp.open("wb") as f:
+        f.write(buf)
     tmp.replace(path)
 
 
-@app.post("/api/update/race")
-def update_race():
+# 既定は minify（React がパースするだけなので整形は不要）。
+# 目視デバッグ用に KEIBA_PRETTY=1 でインデント付きに切り替えられる。
+_ORJSON_OPTS = orjson.OPT_NON_STR_KEYS | (
+    orjson.OPT_INDENT_2 if os.getenv("KEIBA_PRETTY") else 0
+)
+
+
+def serialize_json(data: dict) -> bytes:
+    return orjson.dumps(data, default=_json_default, option=_ORJSON_OPTS)
+
+
+def _should_write(path: Path, digest: bytes) -> bool:
+    if _last_digests.get(path) == digest:
+        return False  # 同一内容の再書き込み（React のポーリング等）は no-op
+    if _last_digests.get(path) is None and path.exists():
+        try:
+            if path.with_suffix(path.suffix + ".sha").read_bytes() == digest:
+                _last_digests[path] = digest
+                return False
+        except OSError:
+            pass
+    return True
+
+
+def commit_json_files(items: list) -> None:
     """
-    POST endpoint called from React "更新" button.
-    Body example: { "target": "saturday", "venue": "中山", "playwright": true } (optional).
+    Atomically commit [(path, tmp, buf), ...]: write+fsync all tmp files first,
+    then rename them in sequence, then fsync each parent dir once.
+    ジャーナルコミットがファイル毎 (3回) ではなく 1 回で済む。
     """
-    global _is_running
+    staged = []
+    for path, tmp, buf in items:
+        digest = hashlib.blake2b(buf, digest_size=16).digest()
+        if not _should_write(path, digest):
+            continue
+        tmp = _staging_tmp(path, tmp)
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, buf)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        staged.append((tmp, path, digest, buf))
+    if not staged:
+        return
+    for tmp, path, digest, buf in staged:
+        os.replace(tmp, path)
+        _atomic_write_bytes(path.with_suffix(path.suffix + ".sha"), digest)
+        # 静的配信用に事前圧縮版 (.json.gz) も並べて書いておく
+        _atomic_write_bytes(
+            path.with_suffix(path.suffix + ".gz"), gzip.compress(buf, compresslevel=6)
+        )
+        _last_digests[path] = digest
+    for parent in {path.parent for _, path, _, _ in staged}:
+        dfd = os.open(parent, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+        try:
+            os.fsync(dfd)
+        finally:
+            os.close(dfd)
 
-    with _lock:
-        if _is_running:
-            return jsonify({"status": "busy", "message": "Update already running"}), 409
-        _is_running = True
 
+def atomic_write_json(path: Path, data: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    commit_json_files([(path, path.with_suffix(path.suffix + ".tmp"), serialize_json(data))])
+
+
+def _run_job(job_id: str, payload: dict) -> None:
+    """Background worker: scrape + write, then record the terminal status."""
     try:
-        payload = request.get_json(silent=True) or {}
         target = payload.get("target")  # "saturday" | "sunday" | "monday" | None
         venue_keyword = payload.get("venue")  # e.g., "中山", "阪神"
         source_url = payload.get("url")
@@ -64,42 +234,149 @@ def update_race():
         fetch_horse_detail = bool(payload.get("fetch_horse_detail"))
         fetch_jockey_detail = bool(payload.get("fetch_jockey_detail"))
 
-        data = scrape_race_data(
-            target_day=target,
-            source_url=source_url,
-            venue_keyword=venue_keyword,
-            use_playwright=use_playwright,
-            allow_partial=allow_partial,
-            all_venues=all_venues,
-            fetch_horse_detail=fetch_horse_detail,
-            fetch_jockey_detail=fetch_jockey_detail,
-        )
-        data["generated_at"] = datetime.now(JST).isoformat(timespec="seconds")
-
-        # RaceTest.json 用に不要フィールドを削除
-        from scraper.race import sanitize_race_data  # 局所 import
-        atomic_write_json(RACE_JSON_PATH, sanitize_race_data(data))
-        atomic_write_json(HORSE_JSON_PATH, build_horse_json(data))
-        atomic_write_json(JOCKEY_JSON_PATH, build_jockey_json(data))
-
-        return jsonify(
-            {
-                "status": "ok",
-                "written_to": str(RACE_JSON_PATH),
-                "generated_at": data["generated_at"],
-            }
+        if use_playwright or all_venues:
+            # Playwright 利用時は async 版でページ取得・詳細 fan-out を並行化する
+            async def _scrape():
+                try:
+                    browser = await _get_browser()
+                except Exception as e:
+                    raise AbortScrapeError(f"Playwright launch failed: {e}")
+                return await scrape_race_data_async(
+                    target_day=target,
+                    source_url=source_url,
+                    venue_keyword=venue_keyword,
+                    use_playwright=use_playwright,
+                    allow_partial=allow_partial,
+                    all_venues=all_venues,
+                    fetch_horse_detail=fetch_horse_detail,
+                    fetch_jockey_detail=fetch_jockey_detail,
+                    browser=browser,
+                )
+
+            data = asyncio.run_coroutine_threadsafe(_scrape(), _get_pw_loop()).result()
+        else:
+            data = scrape_race_data(
+                target_day=target,
+                source_url=source_url,
+                venue_keyword=venue_keyword,
+                use_playwright=use_playwright,
+                allow_partial=allow_partial,
+                all_venues=all_venues,
+                fetch_horse_detail=fetch_horse_detail,
+                fetch_jockey_detail=fetch_jockey_detail,
+            )
+        data["generated_at"] = _now_iso()
+
+        # RaceTest.json 用の不要フィールド削除と horse/jockey の射影を1パスで
+        pool = app.extensions["executor"]
+        race_d, horse_d, jockey_d = build_all(data)
+        generated_at = data["generated_at"]
+        # 元 dict と派生 dict への参照を早めに手放し、エンコード済みの
+        # 派生から順に解放されるようにする（bytes バッファだけが残る）
+        del data
+        buffers = {
+            key: pool.submit(serialize_json, payload)
+            for key, payload in (("race", race_d), ("horse", horse_d), ("jockey", jockey_d))
+        }
+        del race_d, horse_d, jockey_d
+        wait(buffers.values(), return_when=FIRST_EXCEPTION)
+        commit_json_files(
+            [WRITE_TARGETS[key] + (fut.result(),) for key, fut in buffers.items()]
         )
 
+        result = {
+            "status": "ok",
+            "written_to": str(RACE_JSON_PATH),
+            "generated_at": generated_at,
+        }
+
     except AbortScrapeError as e:
-        return jsonify({"status": "aborted", "reason": str(e)}), 200
+        result = {"status": "aborted", "reason": str(e)}
 
     except Exception as e:
-        return jsonify({"status": "error", "error": repr(e)}), 500
+        result = {"status": "error", "error": repr(e)}
+
+    _jobs[job_id] = result
+    _run_sem.release()
+
+
+@app.post("/api/update/race")
+def update_race():
+    """
+    POST endpoint called from React "更新" button.
+    Body example: { "target": "saturday", "venue": "中山", "playwright": true } (optional).
+    Kicks the scrape off in a background thread and returns 202 + job_id;
+    progress is polled via GET /api/update/status/<job_id>.
+    """
+    if not _run_sem.acquire(blocking=False):
+        return jsonify({"status": "busy", "message": "Update already running"}), 409
+    job_id = uuid4().hex
+    _jobs[job_id] = {"status": "running"}
+
+    payload = request.get_json(silent=True) or {}
+    threading.Thread(target=_run_job, args=(job_id, payload), daemon=True).start()
+    return jsonify({"status": "accepted", "job_id": job_id}), 202
+
+
+def _serve_artifact(path: Path):
+    """生成済み JSON を ETag 付きで返す。内容が変わらない限りポーリングは 304 で済む。"""
+    if not path.exists():
+        return jsonify({"status": "error", "error": f"{path.name} not generated yet"}), 404
+    digest = _last_digests.get(path)
+    resp = send_file(
+        path,
+        mimetype="application/json",
+        conditional=True,
+        etag=digest.hex() if digest else True,
+        last_modified=path.stat().st_mtime,
+    )
+    # no-store ではなく no-cache: ブラウザに If-None-Match で再検証させる
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+
+@app.get("/api/race.json")
+def get_race_json():
+    return _serve_artifact(RACE_JSON_PATH)
 
-    finally:
-        with _lock:
-            _is_running = False
+
+@app.get("/api/horse.json")
+def get_horse_json():
+    return _serve_artifact(HORSE_JSON_PATH)
+
+
+@app.get("/api/jockey.json")
+def get_jockey_json():
+    return _serve_artifact(JOCKEY_JSON_PATH)
+
+
+@app.get("/api/race_bundle")
+def get_race_bundle():
+    """race/horse/jockey を1レスポンスで返す。3ファイルの bytes をそのまま
+    連結するだけなので再エンコードは発生しない。"""
+    parts = []
+    for key in ("race", "horse", "jockey"):
+        path = WRITE_TARGETS[key][0]
+        if not path.exists():
+            return jsonify({"status": "error", "error": f"{path.name} not generated yet"}), 404
+        parts.append(b'"' + key.encode() + b'":' + path.read_bytes())
+    return app.response_class(b"{" + b",".join(parts) + b"}", mimetype="application/json")
+
+
+@app.get("/api/update/status/<job_id>")
+def update_status(job_id: str):
+    job = _jobs.get(job_id)
+    if job is None:
+        return jsonify({"status": "unknown", "message": "No such job"}), 404
+    return jsonify(job)
 
 
 if __name__ == "__main__":
-    app.run(host="127.0.0.1", port=5000, debug=True)
+    if os.environ.get("KEIBA_DEBUG"):
+        # Werkzeug dev server (シングルスレッド) はデバッグ用途のみ
+        app.run(host="127.0.0.1", port=5000, debug=True)
+    else:
+        # マルチスレッド + keep-alive でステータスポーリングと長時間 POST を並行処理する
+        from waitress import serve
+
+        serve(app, host="127.0.0.1", port=5000, threads=8)
@@ -1,25 +1,124 @@
 from __future__ import annotations
 
+import sys
+
+if __name__ == "__main__":
+    # CLI として呼ばれる使い捨てプロセスでは .pyc を書き出す意味がない
+    # （cron の高頻度起動でのディスク書き込みを省く）。サーバー経由の
+    # import では通常どおりキャッシュさせる。
+    sys.dont_write_bytecode = True
+
+import asyncio
 import json
+import os
 import re
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone, timedelta
+from functools import lru_cache
 from pathlib import Path
+from types import SimpleNamespace
 from typing import List, Optional
 from urllib.parse import parse_qs, urlparse
-from urllib.request import Request, urlopen
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
+
+# orjson があれば使う（UTF-8 バイト直出しで stdlib json より数倍速い）。
+# CLI を素の環境で動かす場合のために stdlib フォールバックを残す。
+try:
+    import orjson
+
+    def _dumps(obj, pretty: bool = False) -> bytes:
+        opt = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(obj, option=opt)
+
+    _loads = orjson.loads
+except ImportError:  # pragma: no cover
+    def _dumps(obj, pretty: bool = False) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, indent=2 if pretty else None).encode("utf-8")
+
+    _loads = json.loads
 
 BASE_DIR = Path(__file__).resolve().parent
 DEFAULT_HTML_PATH = BASE_DIR.parent / "html.txt"
 BASE_URL = "https://www.jra.go.jp"
 
+# keep-alive でコネクションを使い回す共有セッション
+# （fetch 毎の TCP+TLS ハンドシェイクを初回だけにする）。
+# requests の import 自体が数十 ms あるので、1 バイトも通信しない起動
+# （時間帯ガードで即終了する cron など）では作らない。
+_SESSION = None
+
+
+def _get_session():
+    global _SESSION
+    if _SESSION is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        _SESSION = requests.Session()
+        _SESSION.headers["User-Agent"] = "Mozilla/5.0"
+        adapter = HTTPAdapter(
+            pool_connections=8,
+            pool_maxsize=16,
+            max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=(502, 503, 504)),
+        )
+        _SESSION.mount("https://", adapter)
+        _SESSION.mount("http://", adapter)
+    return _SESSION
+
 # 更新中の時間帯ガード（火〜木 16時台は避ける）
 BLOCKED_WEEKDAYS = {1, 2, 3}  # Tue, Wed, Thu
 BLOCK_START_HOUR = 16
 BLOCK_END_HOUR = 17  # exclusive
 
+# ホットループで使うパターンは import 時に1度だけコンパイルしておく
+# （re モジュールのキャッシュ照会すら馬行×パターン数ぶん積み上がるため）
+_ONCLICK_RE = re.compile(r"doAction\('([^']+)'\s*,\s*'([^']+)'")
+_SYUTSUBA_ID_RE = re.compile(r"syutsuba_(\d+)R")
+_WAKU_ALT_RE = re.compile(r"枠(\d+)(\D*)")
+_COURSE_DIGITS_RE = re.compile(r"([\d,]+)")
+_VENUE_RE = re.compile(r"回(.+?)(\d+)日")
+_BASE_DATE_RE = re.compile(r"\s*(\d{4}年\d{1,2}月\d{1,2}日（[^）]+）)")
+_TARGET_LINK_RE = re.compile(r"\d+回.+?\d+日")
+_JOCKEY_BIRTHDAY_RE = re.compile(r"(\d{4}年\d{1,2}月\d{1,2}日)")
+_JOCKEY_HEIGHT_RE = re.compile(r"身長[:：]?\s*([0-9]+\.?[0-9]*)")
+_JOCKEY_WEIGHT_RE = re.compile(r"体重[:：]?\s*([0-9]+\.?[0-9]*)")
+_JOCKEY_LICENSE_RE = re.compile(r"(初免許年|免許年|初騎乗年)[:：]?\s*([0-9]{4})")
+_JOCKEY_STATS_CURRENT_RE = re.compile(r"本年成績[:：]?\s*([^\s]+)")
+_JOCKEY_STATS_TOTAL_RE = re.compile(r"(累計成績|通算成績)[:：]?\s*([^\s]+)")
+_META_CHARSET_RE = re.compile(rb"charset=[\"']?([\w-]+)")
+
+# Playwright のリンク名マッチも毎回 re.compile しない
+_SYUTSUBA_LINK_RE = re.compile("出馬表")
+_ALL_RACES_LINK_RE = re.compile("全てのレースを表示")
+
+
+def _detect_encoding(content: bytes) -> str:
+    """
+    先頭バイトだけ見てエンコーディングを確定する。
+    （cp932→shift_jis→utf-8 と全文 decode を最大3回繰り返すのを避ける）
+    """
+    m = _META_CHARSET_RE.search(content[:2048])
+    if m:
+        enc = m.group(1).decode("ascii", errors="ignore").lower()
+        if enc in ("shift_jis", "shift-jis", "sjis", "x-sjis", "windows-31j", "ms932"):
+            return "cp932"  # cp932 は shift_jis の上位互換
+        return enc
+    # meta が無ければ先頭 8KB だけ utf-8 を試し、ダメなら JRA 既定の cp932
+    head = content[:8192]
+    try:
+        head.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # 8KB 境界でマルチバイト列が切れただけ（エラー位置が末尾 4 バイト以内で
+        # そこまでは正しい UTF-8）なら UTF-8 と判定する
+        if e.start >= len(head) - 4:
+            return "utf-8"
+        return "cp932"
+
 
 def make_absolute_url(href: str) -> str:
     if not href:
@@ -38,7 +137,7 @@ def parse_onclick_url(onclick: str) -> str:
     """
     if not onclick:
         return ""
-    m = re.search(r"doAction\('([^']+)'\s*,\s*'([^']+)'", onclick)
+    m = _ONCLICK_RE.search(onclick)
     if not m:
         return ""
     path, code = m.group(1), m.group(2)
@@ -55,7 +154,7 @@ class AbortScrapeError(RuntimeError):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class Horse:
     num: str
     waku: str
@@ -97,7 +196,7 @@ class Horse:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class Race:
     race_id: str
     race_number: int
@@ -107,7 +206,8 @@ class Race:
     surface: str
     horses: List[Horse]
 
-    def to_dict(self) -> dict:
+    def to_dict(self, horses: Optional[List[dict]] = None) -> dict:
+        # horses に dict 化済みリストを渡すと再変換せずそのまま使う
         return {
             "race_id": self.race_id,
             "race_number": self.race_number,
@@ -115,83 +215,112 @@ class Race:
             "title": self.title,
             "course_distance": self.course_distance,
             "surface": self.surface,
-            "horses": [h.to_dict() for h in self.horses],
+            "horses": [h.to_dict() for h in self.horses] if horses is None else horses,
         }
 
 
+# 必要なサブツリーだけを C バックエンドの lxml で組み立てる
+# （純 Python の html.parser で全ツリーを作るより数倍速い）
+# class は "syutsuba_unit_list mt20" のように複数トークンで来るため、
+# 完全一致ではなくトークン単位で照合する
+_SYUTSUBA_STRAINER = SoupStrainer(
+    "ul", class_=lambda c: bool(c) and "syutsuba_unit_list" in c.split()
+)
+_DETAIL_STRAINER = SoupStrainer(["table", "dl", "dt", "dd", "th", "td"])
+
+
+def _make_soup(html: str, strainer: Optional[SoupStrainer] = None) -> BeautifulSoup:
+    try:
+        return BeautifulSoup(html, "lxml", parse_only=strainer)
+    except FeatureNotFound:
+        # lxml 未インストール環境向けフォールバック
+        return BeautifulSoup(html, "html.parser", parse_only=strainer)
+
+
 def safe_text(el) -> str:
     return el.get_text(strip=True) if el else ""
 
 
+_SURFACE_TOKS = (("芝", "芝"), ("ダート", "ダート"), ("ﾀﾞｰﾄ", "ダート"))
+
+
 def parse_course(text: str) -> tuple[str, str]:
-    distance = ""
-    surface = ""
-    m = re.search(r"([\d,]+)", text)
-    if m:
-        distance = m.group(1).replace(",", "")
-    if "芝" in text:
-        surface = "芝"
-    elif "ダート" in text or "ﾀﾞｰﾄ" in text:
-        surface = "ダート"
-    return distance, surface or text
+    m = _COURSE_DIGITS_RE.search(text)
+    distance = m.group(1).replace(",", "") if m else ""
+    for tok, surface in _SURFACE_TOKS:
+        if tok in text:
+            return distance, surface
+    return distance, text
 
 
 def parse_race_li(li) -> Race:
-    num_match = re.search(r"syutsuba_(\d+)R", li.get("id", ""))
+    # select_one は呼び出し毎に CSS セレクタを解釈するため、
+    # 行ループ内はすべて find(class_=...) で引く
+    num_match = _SYUTSUBA_ID_RE.search(li.get("id", ""))
     race_number = int(num_match.group(1)) if num_match else 0
-    header = li.select_one(".race_header")
-    date_text = safe_text(header.select_one(".date_line .date"))
-    start_time = safe_text(header.select_one(".date_line .time strong"))
-    title = safe_text(li.select_one(".race_title .race_name"))
-    course_text = safe_text(li.select_one(".race_title .type .course"))
+    header = li.find(class_="race_header")
+    date_line = header.find(class_="date_line") if header else None
+    date_text = safe_text(date_line.find(class_="date") if date_line else None)
+    time_el = date_line.find(class_="time") if date_line else None
+    start_time = safe_text(time_el.find("strong") if time_el else None)
+    race_title = li.find(class_="race_title")
+    title = safe_text(race_title.find(class_="race_name") if race_title else None)
+    type_el = race_title.find(class_="type") if race_title else None
+    course_text = safe_text(type_el.find(class_="course") if type_el else None)
     course_distance, surface = parse_course(course_text)
 
     venue = extract_venue_from_date(date_text) or "unknown"
     race_id = f"{venue}-{race_number:02d}" if race_number else venue
 
     horses: List[Horse] = []
-    for row in li.select("tbody tr"):
-        name = safe_text(row.select_one("td.horse"))
+    tbody = li.find("tbody")
+    for row in tbody.find_all("tr") if tbody else []:
+        td_horse = row.find("td", class_="horse")
+        name = safe_text(td_horse)
         if not name:
             continue
-        serei_text = safe_text(row.select_one("td.age"))
-        waku_text = safe_text(row.select_one("td.waku"))
+        serei_text = safe_text(row.find("td", class_="age"))
+        td_waku = row.find("td", class_="waku")
+        waku_text = safe_text(td_waku)
+        # img の alt 解析は枠番の有無に関わらず 1 回で済ませる
         waku_color = ""
-        if not waku_text:
-            waku_alt = (row.select_one("td.waku img") or {}).get("alt", "")
-            m = re.search(r"枠(\d+)(\D*)", waku_alt)
-            if m:
+        waku_img = td_waku.find("img") if td_waku else None
+        waku_alt = waku_img.get("alt", "") if waku_img else ""
+        m = _WAKU_ALT_RE.search(waku_alt)
+        if m:
+            if not waku_text:
                 waku_text = m.group(1)
-                waku_color = m.group(2).strip()
-        else:
-            waku_alt = (row.select_one("td.waku img") or {}).get("alt", "")
-            m = re.search(r"枠(\d+)(\D*)", waku_alt)
-            if m:
-                waku_color = m.group(2).strip()
-        horse_a = row.select_one("td.horse a")
-        horse_href = (horse_a or {}).get("href", "") or ""
+            waku_color = m.group(2).strip()
+
+        horse_a = td_horse.find("a") if td_horse else None
+        horse_href = horse_a.get("href", "") if horse_a else ""
         if horse_href == "#":
             horse_href = ""
-        detail_href = make_absolute_url(horse_href) or parse_onclick_url((horse_a or {}).get("onclick", ""))
+        detail_href = make_absolute_url(horse_href) or parse_onclick_url(
+            horse_a.get("onclick", "") if horse_a else ""
+        )
 
-        jockey_a = row.select_one("td.jockey a")
-        jockey_href = (jockey_a or {}).get("href", "") or ""
+        td_jockey = row.find("td", class_="jockey")
+        jockey_a = td_jockey.find("a") if td_jockey else None
+        jockey_href = jockey_a.get("href", "") if jockey_a else ""
         if jockey_href == "#":
             jockey_href = ""
-        jockey_href = make_absolute_url(jockey_href) or parse_onclick_url((jockey_a or {}).get("onclick", ""))
+        jockey_href = make_absolute_url(jockey_href) or parse_onclick_url(
+            jockey_a.get("onclick", "") if jockey_a else ""
+        )
         horses.append(
             Horse(
-                num=safe_text(row.select_one("td.num")),
+                num=safe_text(row.find("td", class_="num")),
                 waku=waku_text,
                 waku_color=waku_color,
                 name=name,
                 serei=serei_text,
-                weight=clean_kg(safe_text(row.select_one("td.weight"))),
-                jockey=safe_text(row.select_one("td.jockey")),
+                weight=clean_kg(safe_text(row.find("td", class_="weight"))),
+                jockey=safe_text(td_jockey),
                 jockey_url=jockey_href,
-                trainer=safe_text(row.select_one("td.trainer")),
-                odds=safe_text(row.select_one("td.odds")),
-                bataiju=clean_bataiju(safe_text(row.select_one("td.h_weight"))),
+                trainer=safe_text(row.find("td", class_="trainer")),
+                odds=safe_text(row.find("td", class_="odds")),
+                bataiju=clean_bataiju(safe_text(row.find("td", class_="h_weight"))),
                 detail_url=detail_href,
             )
         )
@@ -216,52 +345,89 @@ def clean_bataiju(text: str) -> str:
 
 
 def extract_venue_from_date(text: str) -> str:
-    m = re.search(r"回(.+?)(\d+)日", text)
+    m = _VENUE_RE.search(text)
     return m.group(1) if m else ""
 
 
 def extract_base_date(text: str) -> str:
-    m = re.match(r"\s*(\d{4}年\d{1,2}月\d{1,2}日（[^）]+）)", text)
+    m = _BASE_DATE_RE.match(text)
     return m.group(1) if m else text
 
 
+# 優先順は従来の分岐順（"8月30日(土)" は 土 が勝つ）を維持する
+_WD_MAP = {
+    "土": "saturday",
+    "日": "sunday",
+    "月": "monday",
+    "火": "tuesday",
+    "水": "wednesday",
+    "木": "thursday",
+    "金": "friday",
+}
+
+
 def weekday_key(text: str) -> str:
-    if "土" in text:
-        return "saturday"
-    if "日" in text:
-        return "sunday"
-    if "月" in text:
-        return "monday"
-    if "火" in text:
-        return "tuesday"
-    if "水" in text:
-        return "wednesday"
-    if "木" in text:
-        return "thursday"
-    if "金" in text:
-        return "friday"
+    found = set(text)
+    for ch, key in _WD_MAP.items():
+        if ch in found:
+            return key
     return "unknown"
 
 
+def _extract_syutsuba_fragment(html: str) -> str:
+    """
+    lxml.html（C 実装）の XPath で ul.syutsuba_unit_list の部分木だけ
+    切り出して返す。strainer があっても bs4 は全タグを Python 側で
+    なめるので、先にフラグメントへ絞るとページ全体分のその走査が消える。
+    切り出せないページはそのまま返して従来経路に任せる。
+    """
+    try:
+        from lxml import html as lxml_html
+
+        tree = lxml_html.fromstring(html)
+        nodes = tree.xpath(
+            '//ul[contains(concat(" ", normalize-space(@class), " "), " syutsuba_unit_list ")]'
+        )
+        if nodes:
+            return "".join(lxml_html.tostring(n, encoding="unicode") for n in nodes)
+    except Exception:
+        pass
+    return html
+
+
 def parse_syutsuba_html(html: str) -> dict:
-    soup = BeautifulSoup(html, "html.parser")
-    race_items = soup.select("ul.syutsuba_unit_list li[id^=syutsuba_]")
+    soup = _make_soup(_extract_syutsuba_fragment(html), strainer=_SYUTSUBA_STRAINER)
+    unit_list = soup.find("ul", class_="syutsuba_unit_list")
+    race_items = (
+        unit_list.find_all("li", id=lambda v: v and v.startswith("syutsuba_"))
+        if unit_list
+        else []
+    )
     if not race_items:
         raise AbortScrapeError("syutsuba_unit_list not found; page structure may have changed.")
 
     races: List[Race] = [parse_race_li(li) for li in race_items]
 
-    first_header = race_items[0].select_one(".race_header")
-    date_text = safe_text(first_header.select_one(".date_line .date"))
+    first_header = race_items[0].find(class_="race_header")
+    first_date_line = first_header.find(class_="date_line") if first_header else None
+    date_text = safe_text(first_date_line.find(class_="date") if first_date_line else None)
     base_date = extract_base_date(date_text)
     venue = extract_venue_from_date(date_text)
     day_key = weekday_key(date_text)
 
-    venue_label = safe_text(first_header.select_one(".date_line")) or date_text
-    venue_block = {"venue": venue, "venue_label": venue_label, "races": [r.to_dict() for r in races]}
+    venue_label = safe_text(first_date_line) or date_text
+    # 馬の dict 化はレース毎に 1 回だけ行い、days 側と venues 側で共有する
+    horse_lists = [[h.to_dict() for h in r.horses] for r in races]
+    venue_block = {
+        "venue": venue,
+        "venue_label": venue_label,
+        "races": [r.to_dict(hl) for r, hl in zip(races, horse_lists)],
+    }
 
     data = {
         "date": base_date,
+        # 構築時にキーを確保しておく（CLI は None のまま、サーバー側が時刻で上書き）
+        "generated_at": None,
         "days": {
             day_key: {
                 "date": date_text,
@@ -281,9 +447,9 @@ def parse_syutsuba_html(html: str) -> dict:
                         "status": "upcoming",
                         "course_distance": race.course_distance,
                         "surface": race.surface,
-                        "horses": [h.to_dict() for h in race.horses],
+                        "horses": hl,
                     }
-                    for race in races
+                    for race, hl in zip(races, horse_lists)
                 ],
             }
         ],
@@ -294,124 +460,174 @@ def parse_syutsuba_html(html: str) -> dict:
 def fetch_html_from_url(url: str, encoding: Optional[str] = None, timeout: int = 10) -> str:
     parsed = urlparse(url)
     qs = parse_qs(parsed.query)
-    req = None
-    # accessK.html などで cname が query に付いている場合は POST で送る
-    if qs.get("cname") and parsed.path.startswith("/JRADB/accessK.html"):
-        cname = qs["cname"][0]
-        body = f"cname={cname}".encode("utf-8")
-        # fallback: cname は query からも残しておく（サーバが GET パラメータを参照する可能性用）
-        req = Request(
-            f"{parsed.scheme}://{parsed.netloc}{parsed.path}?cname={cname}",
-            data=body,
-            headers={"User-Agent": "Mozilla/5.0"},
-        )
-    else:
-        req = Request(url, headers={"User-Agent": "Mozilla/5.0"})
+    session = _get_session()
     try:
-        with urlopen(req, timeout=timeout) as resp:
-            content = resp.read()
+        # accessK.html などで cname が query に付いている場合は POST で送る
+        if qs.get("cname") and parsed.path.startswith("/JRADB/accessK.html"):
+            cname = qs["cname"][0]
+            # fallback: cname は query からも残しておく（サーバが GET パラメータを参照する可能性用）
+            resp = session.post(
+                f"{parsed.scheme}://{parsed.netloc}{parsed.path}?cname={cname}",
+                data={"cname": cname},
+                timeout=timeout,
+            )
+        else:
+            resp = session.get(url, timeout=timeout)
+        resp.raise_for_status()
+        content = resp.content
     except Exception as e:
         raise AbortScrapeError(f"Failed to fetch {url}: {e}")
     if encoding:
         return content.decode(encoding, errors="ignore")
-    for enc in ("cp932", "shift_jis", "utf-8"):
-        try:
-            return content.decode(enc)
-        except Exception:
-            continue
-    return content.decode("utf-8", errors="ignore")
+    try:
+        return content.decode(_detect_encoding(content))
+    except (UnicodeDecodeError, LookupError):
+        return content.decode("utf-8", errors="ignore")
 
 
-def fetch_page_with_playwright(url: str, headless: bool = True, timeout: int = 15000) -> str:
-    try:
-        from playwright.sync_api import sync_playwright
-    except Exception as e:
-        raise AbortScrapeError(f"Playwright import failed: {e}")
+# DOM だけ欲しいので、描画にしか使われないリソースは取得しない。
+# JRA のページは画像・webfont 込みで数 MB、HTML 単体なら数百 KB で済む。
+_BLOCKED_RESOURCE_TYPES = {"image", "font", "stylesheet", "media"}
+
+
+def _block_static_assets(context) -> None:
+    context.route(
+        "**/*",
+        lambda route: route.abort()
+        if route.request.resource_type in _BLOCKED_RESOURCE_TYPES
+        else route.continue_(),
+    )
+
+
+async def _block_static_assets_async(context) -> None:
+    async def handler(route):
+        if route.request.resource_type in _BLOCKED_RESOURCE_TYPES:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    await context.route("**/*", handler)
+
+
+def fetch_page_with_playwright(
+    url: str, headless: bool = True, timeout: int = 15000, browser=None
+) -> str:
+    # browser を渡された場合は起動済みインスタンスを使い回す（起動コスト数秒を省く）
+    if browser is None:
+        try:
+            from playwright.sync_api import sync_playwright
+        except Exception as e:
+            raise AbortScrapeError(f"Playwright import failed: {e}")
+        try:
+            with sync_playwright() as p:
+                b = p.chromium.launch(headless=headless)
+                try:
+                    return fetch_page_with_playwright(url, timeout=timeout, browser=b)
+                finally:
+                    b.close()
+        except AbortScrapeError:
+            raise
+        except Exception as e:
+            raise AbortScrapeError(f"Playwright fetch failed: {e}")
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=headless)
-            page = browser.new_page()
+        context = browser.new_context()
+        _block_static_assets(context)
+        try:
+            page = context.new_page()
             page.goto(url, wait_until="domcontentloaded", timeout=timeout)
             page.wait_for_load_state("domcontentloaded", timeout=timeout)
-            html = page.content()
-            browser.close()
-            return html
+            return page.content()
+        finally:
+            context.close()
     except Exception as e:
         raise AbortScrapeError(f"Playwright fetch failed: {e}")
 
 
-def extract_labeled_value(soup, labels: List[str]) -> str:
+def _label_map(soup) -> dict:
+    """th/dt を1回の走査で {見出しテキスト: 隣接セルテキスト} にまとめる。"""
+    m: dict = {}
+    for tag in soup.find_all(["th", "dt"]):
+        txt = tag.get_text(strip=True)
+        if not txt or txt in m:
+            continue
+        sib = tag.find_next("td" if tag.name == "th" else "dd")
+        if sib:
+            m[txt] = sib.get_text(strip=True)
+    return m
+
+
+def _lookup_label(label_map: dict, labels: List[str]) -> str:
+    # 元実装と同じく部分一致・文書順優先
     for label in labels:
-        th = soup.find(lambda tag: tag.name in ["th", "dt"] and label in tag.get_text())
-        if th:
-            if th.name == "th":
-                td = th.find_next("td")
-                if td:
-                    return td.get_text(strip=True)
-            if th.name == "dt":
-                dd = th.find_next("dd")
-                if dd:
-                    return dd.get_text(strip=True)
+        for key, val in label_map.items():
+            if label in key and val:
+                return val
     return ""
 
 
+def extract_labeled_value(soup, labels: List[str]) -> str:
+    return _lookup_label(_label_map(soup), labels)
+
+
+# 過去走テーブルの出力キーと、対応するヘッダー中のキーワード
+_PAST_RACE_COLS = (
+    ("date", ("年月日",)),
+    ("venue", ("場",)),
+    ("title", ("レース名",)),
+    ("distance", ("距離",)),
+    ("track", ("馬場",)),
+    ("total", ("頭数",)),
+    ("popularity", ("人気",)),
+    ("rank", ("着順",)),
+    ("jockey", ("騎手",)),
+    ("weight", ("負担",)),
+    ("bataiju", ("馬体重",)),
+    ("time", ("タイム",)),
+    ("winner", ("1着", "１着", "着馬", "RT")),
+)
+
+
 def parse_horse_detail(html: str) -> dict:
-    soup = BeautifulSoup(html, "html.parser")
-    father = extract_labeled_value(soup, ["父", "父馬"])
-    mother = extract_labeled_value(soup, ["母", "母馬"])
-    trainer = extract_labeled_value(soup, ["調教師"])
-    birthday = extract_labeled_value(soup, ["生年月日"])
-    color = extract_labeled_value(soup, ["毛色"])
-    serei = extract_labeled_value(soup, ["性齢", "性別・年齢"])
+    soup = _make_soup(html, strainer=_DETAIL_STRAINER)
+    lm = _label_map(soup)
+    father = _lookup_label(lm, ["父", "父馬"])
+    mother = _lookup_label(lm, ["母", "母馬"])
+    trainer = _lookup_label(lm, ["調教師"])
+    birthday = _lookup_label(lm, ["生年月日"])
+    color = _lookup_label(lm, ["毛色"])
+    serei = _lookup_label(lm, ["性齢", "性別・年齢"])
 
     past_races: List[dict] = []
-    def find_idx(headers: List[str], keywords: List[str]) -> Optional[int]:
-        for i, h in enumerate(headers):
-            for kw in keywords:
-                if kw in h:
-                    return i
-        return None
-
     for table in soup.find_all("table"):
+        # 無関係なテーブルで th 全件の get_text を走らせない:
+        # カラム見出しは行頭に来るので、先頭数個の th だけ見て振るい落とす
+        lead_ths = table.find_all("th", limit=8)
+        if not any(
+            "年月日" in t or "レース名" in t or "距離" in t
+            for t in (th.get_text(strip=True) for th in lead_ths)
+        ):
+            continue
         headers = [th.get_text(strip=True) for th in table.find_all("th")]
         if not headers:
             continue
         if any("年月日" in h or "レース名" in h or "距離" in h for h in headers):
-            idx_date = find_idx(headers, ["年月日"])
-            idx_venue = find_idx(headers, ["場"])
-            idx_title = find_idx(headers, ["レース名"])
-            idx_distance = find_idx(headers, ["距離"])
-            idx_track = find_idx(headers, ["馬場"])
-            idx_total = find_idx(headers, ["頭数"])
-            idx_pop = find_idx(headers, ["人気"])
-            idx_rank = find_idx(headers, ["着順"])
-            idx_jockey = find_idx(headers, ["騎手"])
-            idx_weight = find_idx(headers, ["負担"])
-            idx_bataiju = find_idx(headers, ["馬体重"])
-            idx_time = find_idx(headers, ["タイム"])
-            idx_winner = find_idx(headers, ["1着", "１着", "着馬", "RT"])
+            # ヘッダーを 1 回だけ走査し、各カラムの最初に一致した位置を拾う
+            # （従来はカラム毎に find_idx でヘッダー全体を再走査していた）
+            col_idx: dict = {}
+            for i, h in enumerate(headers):
+                for key, kws in _PAST_RACE_COLS:
+                    if key not in col_idx and any(kw in h for kw in kws):
+                        col_idx[key] = i
+            idx_date = col_idx.get("date")
+
+            def pick(cols: List[str], i: Optional[int]) -> str:
+                return cols[i] if i is not None and i < len(cols) else ""
 
             for row in table.find_all("tr"):
                 cols = [c.get_text(strip=True) for c in row.find_all(["td", "th"])]
                 if not cols or (idx_date is not None and cols[0] == "年月日"):
                     continue
-                past_races.append(
-                    {
-                        "date": cols[idx_date] if idx_date is not None and idx_date < len(cols) else "",
-                        "venue": cols[idx_venue] if idx_venue is not None and idx_venue < len(cols) else "",
-                        "title": cols[idx_title] if idx_title is not None and idx_title < len(cols) else "",
-                        "distance": cols[idx_distance] if idx_distance is not None and idx_distance < len(cols) else "",
-                        "track": cols[idx_track] if idx_track is not None and idx_track < len(cols) else "",
-                        "total": cols[idx_total] if idx_total is not None and idx_total < len(cols) else "",
-                        "popularity": cols[idx_pop] if idx_pop is not None and idx_pop < len(cols) else "",
-                        "rank": cols[idx_rank] if idx_rank is not None and idx_rank < len(cols) else "",
-                        "jockey": cols[idx_jockey] if idx_jockey is not None and idx_jockey < len(cols) else "",
-                        "weight": cols[idx_weight] if idx_weight is not None and idx_weight < len(cols) else "",
-                        "bataiju": cols[idx_bataiju] if idx_bataiju is not None and idx_bataiju < len(cols) else "",
-                        "time": cols[idx_time] if idx_time is not None and idx_time < len(cols) else "",
-                        "winner": cols[idx_winner] if idx_winner is not None and idx_winner < len(cols) else "",
-                    }
-                )
+                past_races.append({k: pick(cols, col_idx.get(k)) for k, _ in _PAST_RACE_COLS})
             break
 
     return {
@@ -426,16 +642,19 @@ def parse_horse_detail(html: str) -> dict:
 
 
 def parse_jockey_detail(html: str) -> dict:
-    soup = BeautifulSoup(html, "html.parser")
-    birthday = extract_labeled_value(soup, ["生年月日", "生れ"])
-    height = extract_labeled_value(soup, ["身長", "身長(cm)"])
-    weight = extract_labeled_value(soup, ["体重", "体重(kg)"])
-    first_license = extract_labeled_value(soup, ["初免許年", "初騎乗年", "免許年"])
+    # 本文フォールバックがページ全文を見るため、ここは strainer なしの lxml のみ
+    soup = _make_soup(html)
+    lm = _label_map(soup)
+    birthday = _lookup_label(lm, ["生年月日", "生れ"])
+    height = _lookup_label(lm, ["身長", "身長(cm)"])
+    weight = _lookup_label(lm, ["体重", "体重(kg)"])
+    first_license = _lookup_label(lm, ["初免許年", "初騎乗年", "免許年"])
     stats_current = {}
     stats_total = {}
 
     def parse_stats_table_by_id(table_id: str) -> Optional[dict]:
-        tbl = soup.select_one(f"div#{table_id} table")
+        div = soup.find("div", id=table_id)
+        tbl = div.find("table") if div else None
         if not tbl:
             return None
         # ヘッダーは thead のみを採用（行見出しは含めない）
@@ -478,27 +697,27 @@ def parse_jockey_detail(html: str) -> dict:
     # フォールバック: ページ全文から拾う
     full_text = soup.get_text(" ", strip=True)
     if not birthday:
-        m = re.search(r"(\d{4}年\d{1,2}月\d{1,2}日)", full_text)
+        m = _JOCKEY_BIRTHDAY_RE.search(full_text)
         if m:
             birthday = m.group(1)
     if not height:
-        m = re.search(r"身長[:：]?\s*([0-9]+\.?[0-9]*)", full_text)
+        m = _JOCKEY_HEIGHT_RE.search(full_text)
         if m:
             height = m.group(1)
     if not weight:
-        m = re.search(r"体重[:：]?\s*([0-9]+\.?[0-9]*)", full_text)
+        m = _JOCKEY_WEIGHT_RE.search(full_text)
         if m:
             weight = m.group(1)
     if not first_license:
-        m = re.search(r"(初免許年|免許年|初騎乗年)[:：]?\s*([0-9]{4})", full_text)
+        m = _JOCKEY_LICENSE_RE.search(full_text)
         if m:
             first_license = m.group(2)
     if not stats_current:
-        m = re.search(r"本年成績[:：]?\s*([^\s]+)", full_text)
+        m = _JOCKEY_STATS_CURRENT_RE.search(full_text)
         if m:
             stats_current = m.group(1)
     if not stats_total:
-        m = re.search(r"(累計成績|通算成績)[:：]?\s*([^\s]+)", full_text)
+        m = _JOCKEY_STATS_TOTAL_RE.search(full_text)
         if m:
             stats_total = m.group(2)
 
@@ -512,101 +731,145 @@ def parse_jockey_detail(html: str) -> dict:
     }
 
 
-def fetch_syutsuba_with_playwright(venue_keyword: str, headless: bool = True, timeout: int = 15000) -> str:
-    try:
-        from playwright.sync_api import sync_playwright
-    except Exception as e:
-        raise AbortScrapeError(f"Playwright import failed: {e}")
+def fetch_syutsuba_with_playwright(
+    venue_keyword: str, headless: bool = True, timeout: int = 15000, browser=None
+) -> str:
+    if browser is None:
+        try:
+            from playwright.sync_api import sync_playwright
+        except Exception as e:
+            raise AbortScrapeError(f"Playwright import failed: {e}")
+        try:
+            with sync_playwright() as p:
+                b = p.chromium.launch(headless=headless)
+                try:
+                    return fetch_syutsuba_with_playwright(
+                        venue_keyword, timeout=timeout, browser=b
+                    )
+                finally:
+                    b.close()
+        except AbortScrapeError:
+            raise
+        except Exception as e:
+            raise AbortScrapeError(f"Playwright navigation failed: {e}")
 
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=headless)
-            page = browser.new_page()
+        context = browser.new_context()
+        _block_static_assets(context)
+        try:
+            page = context.new_page()
             page.goto("https://www.jra.go.jp/", wait_until="domcontentloaded", timeout=timeout)
 
-            page.get_by_role("link", name=re.compile("出馬表")).click(timeout=timeout)
+            page.get_by_role("link", name=_SYUTSUBA_LINK_RE).click(timeout=timeout)
             page.wait_for_load_state("domcontentloaded", timeout=timeout)
 
             page.get_by_role("link", name=re.compile(venue_keyword)).click(timeout=timeout)
             page.wait_for_load_state("domcontentloaded", timeout=timeout)
 
-            page.get_by_role("link", name=re.compile("全てのレースを表示")).click(timeout=timeout)
+            page.get_by_role("link", name=_ALL_RACES_LINK_RE).click(timeout=timeout)
             page.wait_for_selector("ul.syutsuba_unit_list", timeout=timeout)
 
-            html = page.content()
-            browser.close()
-            return html
+            return page.content()
+        finally:
+            context.close()
     except Exception as e:
         raise AbortScrapeError(f"Playwright navigation failed: {e}")
 
 
-def fetch_all_syutsuba_with_playwright(headless: bool = True, timeout: int = 15000) -> List[tuple[str, str]]:
-    try:
-        from playwright.sync_api import sync_playwright
-    except Exception as e:
-        raise AbortScrapeError(f"Playwright import failed: {e}")
+def fetch_all_syutsuba_with_playwright(
+    headless: bool = True, timeout: int = 15000, browser=None
+) -> List[tuple[str, str]]:
+    if browser is None:
+        try:
+            from playwright.sync_api import sync_playwright
+        except Exception as e:
+            raise AbortScrapeError(f"Playwright import failed: {e}")
+        try:
+            with sync_playwright() as p:
+                b = p.chromium.launch(headless=headless)
+                try:
+                    return fetch_all_syutsuba_with_playwright(timeout=timeout, browser=b)
+                finally:
+                    b.close()
+        except AbortScrapeError:
+            raise
+        except Exception as e:
+            raise AbortScrapeError(f"Playwright navigation failed (all venues): {e}")
 
     def is_target_link(text: str) -> bool:
         t = text.strip()
-        return bool(re.search(r"\d+回.+?\d+日", t)) and ("WIN5" not in t) and ("重賞" not in t)
+        return bool(_TARGET_LINK_RE.search(t)) and ("WIN5" not in t) and ("重賞" not in t)
 
     try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=headless)
-            context = browser.new_context()
-
+        context = browser.new_context()
+        _block_static_assets(context)
+        try:
             page = context.new_page()
             page.goto("https://www.jra.go.jp/", wait_until="domcontentloaded", timeout=timeout)
-            page.get_by_role("link", name=re.compile("出馬表")).click(timeout=timeout)
+            page.get_by_role("link", name=_SYUTSUBA_LINK_RE).click(timeout=timeout)
             page.wait_for_load_state("domcontentloaded", timeout=timeout)
 
-            labels: List[str] = []
+            # 一覧ページから href も拾っておき、各開催へは直接 goto する
+            # （トップ→出馬表の再ナビゲーションを開催数ぶん省く）
+            targets: List[tuple[str, str]] = []
             for link in page.get_by_role("link").all():
                 txt = (link.inner_text() or "").strip()
-                if is_target_link(txt):
-                    labels.append(txt)
+                if not is_target_link(txt):
+                    continue
+                href = link.get_attribute("href") or ""
+                targets.append((txt, make_absolute_url(href) if href != "#" else ""))
             page.close()
 
-            if not labels:
-                browser.close()
+            if not targets:
                 raise AbortScrapeError("No venue links found on 出馬表ページ。")
 
             results: List[tuple[str, str]] = []
-            for venue_label in labels:
+            for venue_label, href in targets:
                 pg = context.new_page()
-                pg.goto("https://www.jra.go.jp/", wait_until="domcontentloaded", timeout=timeout)
-                pg.get_by_role("link", name=re.compile("出馬表")).click(timeout=timeout)
-                pg.wait_for_load_state("domcontentloaded", timeout=timeout)
-
-                venue_pattern = re.escape(venue_label.split()[0])
-                pg.get_by_role("link", name=re.compile(venue_pattern)).first.click(timeout=timeout * 2)
-                pg.wait_for_load_state("domcontentloaded", timeout=timeout)
-
-                pg.get_by_role("link", name=re.compile("全てのレースを表示")).click(timeout=timeout)
+                if href:
+                    pg.goto(href, wait_until="domcontentloaded", timeout=timeout)
+                else:
+                    # doAction リンク等で href が取れない場合は従来どおりクリック遷移
+                    pg.goto("https://www.jra.go.jp/", wait_until="domcontentloaded", timeout=timeout)
+                    pg.get_by_role("link", name=_SYUTSUBA_LINK_RE).click(timeout=timeout)
+                    pg.wait_for_load_state("domcontentloaded", timeout=timeout)
+                    venue_pattern = re.escape(venue_label.split()[0])
+                    pg.get_by_role("link", name=re.compile(venue_pattern)).first.click(timeout=timeout * 2)
+                    pg.wait_for_load_state("domcontentloaded", timeout=timeout)
+
+                pg.get_by_role("link", name=_ALL_RACES_LINK_RE).click(timeout=timeout)
                 pg.wait_for_selector("ul.syutsuba_unit_list", timeout=timeout)
 
                 html = pg.content()
                 results.append((venue_label, html))
                 pg.close()
 
-            browser.close()
             return results
+        finally:
+            context.close()
+    except AbortScrapeError:
+        raise
     except Exception as e:
         raise AbortScrapeError(f"Playwright navigation failed (all venues): {e}")
 
 
 def read_html_file(path: Path, encoding: Optional[str] = None) -> str:
+    # 1 回だけ読み、デコードは strict で候補を順に試す
+    # （従来はエンコーディング候補毎にファイルを読み直していた）。
+    # ブラウザ保存のファイルは UTF-8 の中身に古い meta charset が残りがちで、
+    # meta を信じて errors="ignore" で落とすと全文が文字化けする。
+    # strict UTF-8 を先に試せばその場合も正しく読める。
+    raw = path.read_bytes()
     if encoding:
-        with path.open("r", encoding=encoding, errors="ignore") as f:
-            return f.read()
-    for enc in ("utf-8", "cp932", "shift_jis"):
+        return raw.decode(encoding, errors="ignore")
+    if raw.startswith(b"\xef\xbb\xbf"):
+        return raw[3:].decode("utf-8", errors="ignore")
+    for enc in ("utf-8", _detect_encoding(raw), "cp932", "shift_jis"):
         try:
-            with path.open("r", encoding=enc) as f:
-                return f.read()
-        except Exception:
+            return raw.decode(enc)
+        except (UnicodeDecodeError, LookupError):
             continue
-    with path.open("r", encoding="utf-8", errors="ignore") as f:
-        return f.read()
+    return raw.decode("utf-8", errors="ignore")
 
 
 def is_scrape_window_ok(now: Optional[datetime] = None) -> bool:
@@ -616,6 +879,67 @@ def is_scrape_window_ok(now: Optional[datetime] = None) -> bool:
     return True
 
 
+# 詳細ページ fan-out の同時接続数（jra.go.jp への負荷と相談）
+DETAIL_FETCH_WORKERS = 8
+# --all-venues の会場ページを同時に開く数
+VENUE_FETCH_CONCURRENCY = 4
+
+
+def _safe_fetch(url: str) -> tuple:
+    """fetch_html_from_url の例外を (html, exc) に畳む（スレッドプール用）。"""
+    try:
+        return fetch_html_from_url(url), None
+    except Exception as e:
+        return None, e
+
+
+@lru_cache(maxsize=2048)
+def _cached_horse_detail(url: str) -> dict:
+    """取得＋解析をまとめてメモ化（同一プロセス内の再実行で再取得しない）。"""
+    return parse_horse_detail(fetch_html_from_url(url))
+
+
+@lru_cache(maxsize=2048)
+def _cached_jockey_detail(url: str) -> dict:
+    return parse_jockey_detail(fetch_html_from_url(url))
+
+
+def _safe_horse_detail(url: str) -> tuple:
+    try:
+        return _cached_horse_detail(url), None
+    except Exception as e:
+        return None, e
+
+
+def _safe_jockey_detail(url: str) -> tuple:
+    try:
+        return _cached_jockey_detail(url), None
+    except Exception as e:
+        return None, e
+
+
+_HORSE_DETAIL_KEYS = ("father", "mother", "trainer", "birthday", "color", "serei")
+
+
+def _apply_horse_detail(h: dict, detail: dict) -> None:
+    # 上書きは値があるときだけ
+    for key in _HORSE_DETAIL_KEYS:
+        if detail.get(key):
+            h[key] = detail[key]
+    if detail.get("pastRaces"):
+        h["pastRaces"] = detail["pastRaces"]
+
+
+def _clear_jockey_bleed_fields(h: dict) -> None:
+    # clear any horse-detail fields that might bleed into jockey info
+    h["birthday"] = ""
+    h["height"] = ""
+    h["weight"] = ""
+    h["first_license"] = ""
+    h["stats_current"] = {}
+    h["stats_total"] = {}
+
+
 def scrape_race_data(
     target_day: Optional[str] = None,
     source_url: Optional[str] = None,
@@ -626,13 +950,19 @@ def scrape_race_data(
     all_venues: bool = False,
     fetch_horse_detail: bool = False,
     fetch_jockey_detail: bool = False,
+    browser=None,
 ) -> dict:
     if not is_scrape_window_ok() and not allow_partial:
         raise AbortScrapeError("Scraping halted: site likely updating (Tue-Thu 16:00頃).")
 
+    # メモ化は 1 回の実行内の重複排除に限定する。プロセス寿命で持つと
+    # サーバーの更新ボタンを押しても馬柱・騎手成績が前回の結果のまま返る
+    _cached_horse_detail.cache_clear()
+    _cached_jockey_detail.cache_clear()
+
     if all_venues:
         # 常にヘッドレスで実行（ブラウザを前面表示しない）
-        venues_html = fetch_all_syutsuba_with_playwright(headless=True)
+        venues_html = fetch_all_syutsuba_with_playwright(headless=True, browser=browser)
         merged: Optional[dict] = None
         for venue_label, html in venues_html:
             data = parse_syutsuba_html(html)
@@ -659,7 +989,7 @@ def scrape_race_data(
         elif use_playwright:
             if not venue_keyword:
                 raise AbortScrapeError("venue_keyword is required when use_playwright is True.")
-            html = fetch_syutsuba_with_playwright(venue_keyword=venue_keyword)
+            html = fetch_syutsuba_with_playwright(venue_keyword=venue_keyword, browser=browser)
         else:
             path = html_path or DEFAULT_HTML_PATH
             if not path.exists():
@@ -671,101 +1001,508 @@ def scrape_race_data(
         data.setdefault("days", {})[target_day] = data["days"][next(iter(data["days"]))]
 
     if fetch_horse_detail:
+        # URL 毎に馬への参照をまとめ、純粋な I/O 待ちをスレッドプールで並行化する
+        horses_by_url: dict = {}
         for venue in data.get("venues", []):
             for race in venue.get("races", []):
                 for h in race.get("horses", []):
                     href = h.get("detail_url")
-                    if not href:
-                        continue
-                    try:
-                        html_detail = fetch_html_from_url(href)
+                    if href:
+                        horses_by_url.setdefault(href, []).append(h)
+        if horses_by_url:
+            with ThreadPoolExecutor(max_workers=DETAIL_FETCH_WORKERS) as ex:
+                fetched = dict(zip(horses_by_url, ex.map(_safe_horse_detail, horses_by_url)))
+            for href, hs in horses_by_url.items():
+                detail, exc = fetched[href]
+                if exc is not None:
+                    for h in hs:
+                        h.setdefault("detail_error", str(exc))
+                    continue
+                try:
+                    # キャッシュ共有のため呼び出し側でコピーしてから使う
+                    detail = dict(detail)
+                    if use_playwright and not detail.get("father") and not detail.get("pastRaces"):
+                        html_detail = fetch_page_with_playwright(href, browser=browser)
                         detail = parse_horse_detail(html_detail)
-                        if use_playwright and not detail.get("father") and not detail.get("pastRaces"):
-                            html_detail = fetch_page_with_playwright(href)
-                            detail = parse_horse_detail(html_detail)
-                        # 上書きは値があるときだけ
-                        for key in ["father", "mother", "trainer", "birthday", "color", "serei"]:
-                            if detail.get(key):
-                                h[key] = detail[key]
-                        if detail.get("pastRaces"):
-                            h["pastRaces"] = detail["pastRaces"]
-                    except Exception as e:
+                    for h in hs:
+                        _apply_horse_detail(h, detail)
+                except Exception as e:
+                    for h in hs:
                         h.setdefault("detail_error", str(e))
 
     if fetch_jockey_detail:
         jockey_seen = {}
+        to_fetch: dict = {}  # name -> url（既に重複排除済み）
+        # 1 回の走査で取得対象と「書き戻し先の馬 dict」を両方集める
+        horse_refs: dict = defaultdict(list)
         for venue in data.get("venues", []):
             for race in venue.get("races", []):
                 for h in race.get("horses", []):
-                    # clear any horse-detail fields that might bleed into jockey info
-                    h["birthday"] = ""
-                    h["height"] = ""
-                    h["weight"] = ""
-                    h["first_license"] = ""
-                    h["stats_current"] = {}
-                    h["stats_total"] = {}
+                    _clear_jockey_bleed_fields(h)
 
                     name = h.get("jockey")
+                    if name:
+                        horse_refs[name].append(h)
                     url = h.get("jockey_url")
-                    if not name or not url or name in jockey_seen:
-                        continue
-                    try:
-                        html_j = fetch_html_from_url(url)
+                    if name and url and name not in to_fetch:
+                        to_fetch[name] = url
+        if to_fetch:
+            with ThreadPoolExecutor(max_workers=DETAIL_FETCH_WORKERS) as ex:
+                fetched = dict(zip(to_fetch, ex.map(_safe_jockey_detail, to_fetch.values())))
+            for name, url in to_fetch.items():
+                detail, exc = fetched[name]
+                if exc is not None:
+                    continue
+                try:
+                    detail = dict(detail)
+                    if use_playwright and not detail.get("birthday") and not detail.get("stats_current"):
+                        html_j = fetch_page_with_playwright(url, browser=browser)
                         detail = parse_jockey_detail(html_j)
-                        if use_playwright and not detail.get("birthday") and not detail.get("stats_current"):
-                            html_j = fetch_page_with_playwright(url)
-                            detail = parse_jockey_detail(html_j)
-                        jockey_seen[name] = detail
-                    except Exception:
-                        continue
-        # attach back to horses for build_jockey_json
+                    jockey_seen[name] = detail
+                except Exception:
+                    continue
+        # build_jockey_json 向けに馬側へ書き戻す（木をもう一度歩かない）
+        for name, det in jockey_seen.items():
+            for h in horse_refs[name]:
+                h.update(det)
+    return data
+
+
+async def fetch_page_with_playwright_async(
+    url: str, headless: bool = True, timeout: int = 15000, browser=None
+) -> str:
+    if browser is None:
+        try:
+            from playwright.async_api import async_playwright
+        except Exception as e:
+            raise AbortScrapeError(f"Playwright import failed: {e}")
+        try:
+            async with async_playwright() as p:
+                b = await p.chromium.launch(headless=headless)
+                try:
+                    return await fetch_page_with_playwright_async(url, timeout=timeout, browser=b)
+                finally:
+                    await b.close()
+        except AbortScrapeError:
+            raise
+        except Exception as e:
+            raise AbortScrapeError(f"Playwright fetch failed: {e}")
+    try:
+        context = await browser.new_context()
+        await _block_static_assets_async(context)
+        try:
+            page = await context.new_page()
+            await page.goto(url, wait_until="domcontentloaded", timeout=timeout)
+            await page.wait_for_load_state("domcontentloaded", timeout=timeout)
+            return await page.content()
+        finally:
+            await context.close()
+    except Exception as e:
+        raise AbortScrapeError(f"Playwright fetch failed: {e}")
+
+
+async def fetch_syutsuba_with_playwright_async(
+    venue_keyword: str, headless: bool = True, timeout: int = 15000, browser=None
+) -> str:
+    if browser is None:
+        try:
+            from playwright.async_api import async_playwright
+        except Exception as e:
+            raise AbortScrapeError(f"Playwright import failed: {e}")
+        try:
+            async with async_playwright() as p:
+                b = await p.chromium.launch(headless=headless)
+                try:
+                    return await fetch_syutsuba_with_playwright_async(
+                        venue_keyword, timeout=timeout, browser=b
+                    )
+                finally:
+                    await b.close()
+        except AbortScrapeError:
+            raise
+        except Exception as e:
+            raise AbortScrapeError(f"Playwright navigation failed: {e}")
+
+    try:
+        context = await browser.new_context()
+        await _block_static_assets_async(context)
+        try:
+            page = await context.new_page()
+            await page.goto("https://www.jra.go.jp/", wait_until="domcontentloaded", timeout=timeout)
+
+            await page.get_by_role("link", name=_SYUTSUBA_LINK_RE).click(timeout=timeout)
+            await page.wait_for_load_state("domcontentloaded", timeout=timeout)
+
+            await page.get_by_role("link", name=re.compile(venue_keyword)).click(timeout=timeout)
+            await page.wait_for_load_state("domcontentloaded", timeout=timeout)
+
+            await page.get_by_role("link", name=_ALL_RACES_LINK_RE).click(timeout=timeout)
+            await page.wait_for_selector("ul.syutsuba_unit_list", timeout=timeout)
+
+            return await page.content()
+        finally:
+            await context.close()
+    except Exception as e:
+        raise AbortScrapeError(f"Playwright navigation failed: {e}")
+
+
+async def fetch_all_syutsuba_with_playwright_async(
+    headless: bool = True, timeout: int = 15000, browser=None
+) -> List[tuple[str, str]]:
+    if browser is None:
+        try:
+            from playwright.async_api import async_playwright
+        except Exception as e:
+            raise AbortScrapeError(f"Playwright import failed: {e}")
+        try:
+            async with async_playwright() as p:
+                b = await p.chromium.launch(headless=headless)
+                try:
+                    return await fetch_all_syutsuba_with_playwright_async(timeout=timeout, browser=b)
+                finally:
+                    await b.close()
+        except AbortScrapeError:
+            raise
+        except Exception as e:
+            raise AbortScrapeError(f"Playwright navigation failed (all venues): {e}")
+
+    def is_target_link(text: str) -> bool:
+        t = text.strip()
+        return bool(_TARGET_LINK_RE.search(t)) and ("WIN5" not in t) and ("重賞" not in t)
+
+    try:
+        context = await browser.new_context()
+        await _block_static_assets_async(context)
+        try:
+            page = await context.new_page()
+            await page.goto("https://www.jra.go.jp/", wait_until="domcontentloaded", timeout=timeout)
+            await page.get_by_role("link", name=_SYUTSUBA_LINK_RE).click(timeout=timeout)
+            await page.wait_for_load_state("domcontentloaded", timeout=timeout)
+
+            targets: List[tuple[str, str]] = []
+            for link in await page.get_by_role("link").all():
+                txt = (await link.inner_text() or "").strip()
+                if not is_target_link(txt):
+                    continue
+                href = await link.get_attribute("href") or ""
+                targets.append((txt, make_absolute_url(href) if href != "#" else ""))
+            await page.close()
+
+            if not targets:
+                raise AbortScrapeError("No venue links found on 出馬表ページ。")
+
+            # 会場毎のページ取得は独立なので並行化する（レイテンシ支配の処理）。
+            # 同一 context 内のページ数は Semaphore で抑える。
+            sem = asyncio.Semaphore(VENUE_FETCH_CONCURRENCY)
+
+            async def fetch_one(venue_label: str, href: str) -> tuple[str, str]:
+                async with sem:
+                    pg = await context.new_page()
+                    try:
+                        if href:
+                            await pg.goto(href, wait_until="domcontentloaded", timeout=timeout)
+                        else:
+                            await pg.goto("https://www.jra.go.jp/", wait_until="domcontentloaded", timeout=timeout)
+                            await pg.get_by_role("link", name=_SYUTSUBA_LINK_RE).click(timeout=timeout)
+                            await pg.wait_for_load_state("domcontentloaded", timeout=timeout)
+                            venue_pattern = re.escape(venue_label.split()[0])
+                            await pg.get_by_role("link", name=re.compile(venue_pattern)).first.click(timeout=timeout * 2)
+                            await pg.wait_for_load_state("domcontentloaded", timeout=timeout)
+
+                        await pg.get_by_role("link", name=_ALL_RACES_LINK_RE).click(timeout=timeout)
+                        await pg.wait_for_selector("ul.syutsuba_unit_list", timeout=timeout)
+                        return venue_label, await pg.content()
+                    finally:
+                        await pg.close()
+
+            # gather は引数順で返すので会場の並びは維持される
+            return list(await asyncio.gather(*(fetch_one(label, href) for label, href in targets)))
+        finally:
+            await context.close()
+    except AbortScrapeError:
+        raise
+    except Exception as e:
+        raise AbortScrapeError(f"Playwright navigation failed (all venues): {e}")
+
+
+async def scrape_race_data_async(
+    target_day: Optional[str] = None,
+    source_url: Optional[str] = None,
+    html_path: Optional[Path] = None,
+    allow_partial: bool = False,
+    venue_keyword: Optional[str] = None,
+    use_playwright: bool = False,
+    all_venues: bool = False,
+    fetch_horse_detail: bool = False,
+    fetch_jockey_detail: bool = False,
+    browser=None,
+    concurrency: int = 6,
+) -> dict:
+    """
+    scrape_race_data の async 版。ページ取得はほぼネットワーク待ちなので、
+    詳細ページの fan-out を asyncio.Semaphore(concurrency) で並行化する。
+    browser には playwright.async_api の Browser を渡す。
+    """
+    if not is_scrape_window_ok() and not allow_partial:
+        raise AbortScrapeError("Scraping halted: site likely updating (Tue-Thu 16:00頃).")
+
+    if all_venues:
+        venues_html = await fetch_all_syutsuba_with_playwright_async(headless=True, browser=browser)
+        merged: Optional[dict] = None
+        for venue_label, html in venues_html:
+            data = parse_syutsuba_html(html)
+            if data.get("venues"):
+                data["venues"][0]["session"] = venue_label
+                data["venues"][0]["name"] = data["venues"][0].get("venue") or venue_label
+            if merged is None:
+                merged = data
+            else:
+                day_key = next(iter(data["days"]))
+                if day_key not in merged["days"]:
+                    merged["days"][day_key] = data["days"][day_key]
+                else:
+                    merged["days"][day_key]["venues"].extend(data["days"][day_key]["venues"])
+                merged["venues"].extend(data["venues"])
+        if merged is None:
+            raise AbortScrapeError("No venue data fetched.")
+        data = merged
+    else:
+        if source_url:
+            html = await asyncio.to_thread(fetch_html_from_url, source_url)
+        elif use_playwright:
+            if not venue_keyword:
+                raise AbortScrapeError("venue_keyword is required when use_playwright is True.")
+            html = await fetch_syutsuba_with_playwright_async(
+                venue_keyword=venue_keyword, browser=browser
+            )
+        else:
+            path = html_path or DEFAULT_HTML_PATH
+            if not path.exists():
+                raise AbortScrapeError(f"HTML file not found: {path}")
+            html = await asyncio.to_thread(read_html_file, path)
+        data = parse_syutsuba_html(html)
+
+    if target_day and target_day not in data.get("days", {}):
+        data.setdefault("days", {})[target_day] = data["days"][next(iter(data["days"]))]
+
+    sem = asyncio.Semaphore(concurrency)
+
+    if fetch_horse_detail:
+
+        async def enrich_horse(h: dict) -> None:
+            href = h.get("detail_url")
+            if not href:
+                return
+            try:
+                async with sem:
+                    html_detail = await asyncio.to_thread(fetch_html_from_url, href)
+                detail = parse_horse_detail(html_detail)
+                if use_playwright and not detail.get("father") and not detail.get("pastRaces"):
+                    async with sem:
+                        html_detail = await fetch_page_with_playwright_async(href, browser=browser)
+                    detail = parse_horse_detail(html_detail)
+                _apply_horse_detail(h, detail)
+            except Exception as e:
+                h.setdefault("detail_error", str(e))
+
+        await asyncio.gather(
+            *(
+                enrich_horse(h)
+                for venue in data.get("venues", [])
+                for race in venue.get("races", [])
+                for h in race.get("horses", [])
+            )
+        )
+
+    if fetch_jockey_detail:
+        to_fetch: dict = {}
+        # 同期版と同じく、取得対象と書き戻し先を 1 回の走査で集める
+        horse_refs: dict = defaultdict(list)
         for venue in data.get("venues", []):
             for race in venue.get("races", []):
                 for h in race.get("horses", []):
-                    det = jockey_seen.get(h.get("jockey"))
-                    if det:
-                        h.update(det)
+                    _clear_jockey_bleed_fields(h)
+                    name = h.get("jockey")
+                    if name:
+                        horse_refs[name].append(h)
+                    url = h.get("jockey_url")
+                    if name and url and name not in to_fetch:
+                        to_fetch[name] = url
+
+        jockey_seen: dict = {}
+
+        async def fetch_jockey(name: str, url: str) -> None:
+            try:
+                async with sem:
+                    html_j = await asyncio.to_thread(fetch_html_from_url, url)
+                detail = parse_jockey_detail(html_j)
+                if use_playwright and not detail.get("birthday") and not detail.get("stats_current"):
+                    async with sem:
+                        html_j = await fetch_page_with_playwright_async(url, browser=browser)
+                    detail = parse_jockey_detail(html_j)
+                jockey_seen[name] = detail
+            except Exception:
+                pass
+
+        await asyncio.gather(*(fetch_jockey(n, u) for n, u in to_fetch.items()))
+
+        for name, det in jockey_seen.items():
+            for h in horse_refs[name]:
+                h.update(det)
     return data
 
 
+# horse/jockey 出力の固定スキーマ。射影はこの 2 つから機械的に導出するので、
+# フィールドの追加・削除はここを書き換えるだけで全ビルダーに反映される。
+HORSE_FIELDS = ("name", "serei", "trainer", "father", "mother", "birthday", "color", "pastRaces")
+JOCKEY_FIELDS = ("name", "birthday", "height", "weight", "first_license", "stats_current", "stats_total")
+
+
+def _compile_projector(fields: tuple, list_fields: tuple = ("pastRaces",)):
+    """
+    スキーマ定数から dict リテラル直書きの射影関数を exec で生成する。
+    内包表記＋キー毎の分岐をループで回すより、固定形の BUILD_MAP 1 発の
+    方が数百エントリ × 8 フィールドの規模では目に見えて速い。
+    """
+    items = ", ".join(
+        f"{k!r}: h.get({k!r}, [])" if k in list_fields else f'{k!r}: h.get({k!r}, "")'
+        for k in fields
+    )
+    ns: dict = {}
+    exec(compile(f"def _proj(h):\n    return {{{items}}}\n", "<projector>", "exec"), ns)
+    return ns["_proj"]
+
+
+_project_horse = _compile_projector(HORSE_FIELDS)
+_project_jockey_fields = _compile_projector(JOCKEY_FIELDS)
+
+
+def _project_jockey(h: dict, name: str) -> dict:
+    rec = _project_jockey_fields(h)
+    rec["name"] = name
+    return rec
+
+
 def build_horse_json(race_data: dict) -> dict:
     horses: List[dict] = []
     for venue in race_data.get("venues", []):
         for race in venue.get("races", []):
             for h in race.get("horses", []):
-                entry = dict(h)
-                allowed = {
-                    "name": entry.get("name", ""),
-                    "serei": entry.get("serei", ""),
-                    "trainer": entry.get("trainer", ""),
-                    "father": entry.get("father", ""),
-                    "mother": entry.get("mother", ""),
-                    "birthday": entry.get("birthday", ""),
-                    "color": entry.get("color", ""),
-                    "pastRaces": entry.get("pastRaces", []),
-                }
-                horses.append(allowed)
+                horses.append(_project_horse(h))
     return {"horses": horses}
 
 
 def sanitize_race_data(data: dict) -> dict:
-    new_data = json.loads(json.dumps(data))
+    # JSON の serialize+parse で deep copy するのは O(バイト数) の純粋な無駄。
+    # 書き換えるのは horse dict だけなので、その階層だけ作り直し
+    # 文字列などの immutable な値は参照のまま使い回す。
+    def clean_venues(venues: List[dict]) -> List[dict]:
+        return [
+            {
+                **v,
+                "races": [
+                    {
+                        **r,
+                        "horses": [
+                            {k: val for k, val in h.items() if k not in _SANITIZE_DROP_KEYS}
+                            for h in r.get("horses", [])
+                        ],
+                    }
+                    for r in v.get("races", [])
+                ],
+            }
+            for v in venues
+        ]
+
+    new_data: dict = {}
+    for key, value in data.items():
+        if key == "venues":
+            new_data[key] = clean_venues(value)
+        elif key == "days":
+            new_data[key] = {
+                day_key: {**day, "venues": clean_venues(day.get("venues", []))}
+                for day_key, day in value.items()
+            }
+        else:
+            new_data[key] = value
+    return new_data
+
+
+_SANITIZE_DROP_KEYS = ("odds", "detail_url", "jockey_url")
+
+
+def sanitize_race_data_in_place(data: dict) -> dict:
+    """
+    sanitize_race_data の破壊的版。構造を作り直さず horse dict から
+    直接キーを落とすので、中間コピーが一切発生しない。
+    呼び出し側が race_data をこの後使い捨てる場合（CLI の最終出力など）向け。
+    処理済みの dict には "_sanitized" を立て、再呼び出しを O(1) にする。
+    """
+    if data.get("_sanitized"):
+        return data
 
-    def clean_venues(venues: List[dict]):
+    def strip_venues(venues: List[dict]) -> None:
         for v in venues:
             for r in v.get("races", []):
                 for h in r.get("horses", []):
-                    for key in [
-                        "odds",
-                        "detail_url",
-                        "jockey_url",
-                    ]:
+                    for key in _SANITIZE_DROP_KEYS:
                         h.pop(key, None)
 
-    clean_venues(new_data.get("venues", []))
-    for day in new_data.get("days", {}).values():
-        clean_venues(day.get("venues", []))
-    return new_data
+    strip_venues(data.get("venues", []))
+    for day in data.get("days", {}).values():
+        strip_venues(day.get("venues", []))
+    data["_sanitized"] = True
+    return data
+
+
+def build_all(race_data: dict) -> tuple[dict, dict, dict]:
+    """
+    sanitize_race_data / build_horse_json / build_jockey_json 相当を
+    1パスで生成する（3回の全走査を1回にまとめる）。
+    Returns (sanitized_race, horse_json, jockey_json).
+    """
+    horses: List[dict] = []
+    jockeys: dict = {}
+
+    def strip_horse(h: dict) -> dict:
+        return {k: v for k, v in h.items() if k not in _SANITIZE_DROP_KEYS}
+
+    def project_horse(h: dict) -> dict:
+        # 射影は CLI ビルダーと同じコンパイル済みプロジェクタを使う
+        # （スキーマ定数 HORSE_FIELDS / JOCKEY_FIELDS が唯一の定義点）
+        horses.append(_project_horse(h))
+        name = h.get("jockey", "")
+        if name and name not in jockeys:
+            jockeys[name] = _project_jockey(h, name)
+        return strip_horse(h)
+
+    def clean_venues(venues: List[dict], collect: bool) -> List[dict]:
+        visit = project_horse if collect else strip_horse
+        return [
+            {
+                **v,
+                "races": [
+                    {**r, "horses": [visit(h) for h in r.get("horses", [])]}
+                    for r in v.get("races", [])
+                ],
+            }
+            for v in venues
+        ]
+
+    sanitized: dict = {}
+    for key, value in race_data.items():
+        if key == "venues":
+            # horse/jockey の抽出対象は venues 側だけ（従来 builder と同じ範囲）
+            sanitized[key] = clean_venues(value, collect=True)
+        elif key == "days":
+            sanitized[key] = {
+                day_key: {**day, "venues": clean_venues(day.get("venues", []), collect=False)}
+                for day_key, day in value.items()
+            }
+        else:
+            sanitized[key] = value
+
+    return sanitized, {"horses": horses}, {"jockeys": list(jockeys.values())}
 
 
 def build_jockey_json(race_data: dict) -> dict:
@@ -776,22 +1513,104 @@ def build_jockey_json(race_data: dict) -> dict:
                 name = h.get("jockey", "")
                 if not name:
                     continue
-                info = jockeys.setdefault(
-                    name,
-                    {
-                        "name": name,
-                        "birthday": h.get("birthday", ""),
-                        "height": h.get("height", ""),
-                        "weight": h.get("weight", ""),
-                        "first_license": h.get("first_license", ""),
-                        "stats_current": h.get("stats_current", ""),
-                        "stats_total": h.get("stats_total", ""),
-                    },
-                )
+                if name not in jockeys:
+                    jockeys[name] = _project_jockey(h, name)
     return {"jockeys": list(jockeys.values())}
 
 
-def main():
+def build_horse_and_jockey(race_data: dict) -> tuple[dict, dict]:
+    """--horses と --jockeys が両方要るとき用。木を 1 回だけ歩いて両方作る。"""
+    horses: List[dict] = []
+    jockeys: dict = {}
+    for venue in race_data.get("venues", []):
+        for race in venue.get("races", []):
+            for h in race.get("horses", []):
+                horses.append(_project_horse(h))
+                name = h.get("jockey", "")
+                if name and name not in jockeys:
+                    jockeys[name] = _project_jockey(h, name)
+    return {"horses": horses}, {"jockeys": list(jockeys.values())}
+
+
+def _write_tmp_bytes(path: Path, buf: bytes) -> Path:
+    """path の隣の .tmp へ 1 回の os.write で書き、tmp のパスを返す。
+    os.replace は呼び出し側がまとめて行う（全成果物の差し替えを一括にするため）。"""
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, buf)
+    finally:
+        os.close(fd)
+    return tmp
+
+
+def _atomic_write_bytes(path: Path, buf: bytes) -> None:
+    """tmp に 1 回の os.write で書いて os.replace で差し替える。
+    TextIOWrapper のバッファリングを挟まず、途中失敗でも元ファイルが残る。"""
+    os.replace(_write_tmp_bytes(path, buf), path)
+
+
+def _dump(path, obj, pretty: bool = False) -> Path:
+    """JSON を tmp へ書き出し tmp のパスを返す（CLI 出力用）。
+    親ディレクトリは呼び出し側で用意する。"""
+    return _write_tmp_bytes(Path(path), _dumps(obj, pretty=pretty))
+
+
+def _stream_dump_race(path, data: dict, pretty: bool = False) -> Path:
+    """
+    --all-venues の日は race payload が数 MB になるため、venues を
+    1 要素ずつエンコードしながら書く。全体を 1 本のバッファに持たないので
+    ピークメモリは O(最大 venue)、先に書いた分はエンコード中にカーネル側で
+    writeback が進む。インデント指定時は枠組みが組めないので一括出力に戻す。
+    _dump と同じく tmp へ書いて tmp のパスを返す。
+    """
+    venues = data.get("venues")
+    if pretty or not isinstance(venues, list):
+        return _dump(path, data, pretty=pretty)
+    head = {k: v for k, v in data.items() if k != "venues"}
+    head_bytes = _dumps(head)  # b'{...}'
+    p = Path(path)
+    tmp = p.with_suffix(p.suffix + ".tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, head_bytes[:-1] + (b',' if len(head_bytes) > 2 else b'') + b'"venues":[')
+        for i, venue in enumerate(venues):
+            os.write(fd, (b"," if i else b"") + _dumps(venue))
+        os.write(fd, b"]}")
+    finally:
+        os.close(fd)
+    return tmp
+
+
+# CLI フラグ定義。cron からの高頻度起動で argparse の import と
+# パーサ構築（数十 ms）を払わないよう、通常経路は手書きパーサで処理し、
+# --help と不正入力のときだけ argparse に委ねる。
+_VALUE_FLAGS = {
+    "--url": "url",
+    "--html": "html",
+    "--out": "out",
+    "--horses": "horses",
+    "--jockeys": "jockeys",
+    "--target-day": "target_day",
+    "--venue": "venue",
+    "--profile": "profile",
+}
+_BOOL_FLAGS = {
+    "--allow-partial": "allow_partial",
+    "--playwright": "playwright",
+    "--all-venues": "all_venues",
+    "--fetch-horse-detail": "fetch_horse_detail",
+    "--pretty": "pretty",
+    "--reuse-browser": "reuse_browser",
+    "--fsync": "fsync",
+}
+# 既定 True のフラグを倒すための否定形
+_FALSE_FLAGS = {
+    "--no-reuse-browser": "reuse_browser",
+}
+
+
+def _build_parser():
     import argparse
 
     parser = argparse.ArgumentParser(description="Scrape JRA 出馬表 and dump JSON.")
@@ -806,10 +1625,66 @@ def main():
     parser.add_argument("--playwright", action="store_true", help="Use Playwright navigation from jra.go.jp home.")
     parser.add_argument("--all-venues", action="store_true", help="Fetch all venues from the 出馬表一覧 via Playwright.")
     parser.add_argument("--fetch-horse-detail", action="store_true", help="Fetch horse detail pages and enrich HorseTest.json.")
-    args = parser.parse_args()
+    parser.add_argument("--pretty", action="store_true", help="Indent output JSON (default is compact).")
+    parser.add_argument("--reuse-browser", action="store_true", default=True, help="Launch one Playwright browser and reuse it for every page (default).")
+    parser.add_argument("--no-reuse-browser", dest="reuse_browser", action="store_false", help="Launch a fresh browser per page (old behaviour).")
+    parser.add_argument("--fsync", action="store_true", help="os.sync() after the outputs are in place (slow disks/NFS).")
+    parser.add_argument("--profile", metavar="PATH", help="Write a cProfile .prof dump of the run to PATH.")
+    return parser
+
+
+def _parse_args(argv: List[str]):
+    if "-h" in argv or "--help" in argv:
+        return _build_parser().parse_args(argv)
+    ns = SimpleNamespace(
+        **{attr: None for attr in _VALUE_FLAGS.values()},
+        **{attr: False for attr in _BOOL_FLAGS.values()},
+    )
+    ns.reuse_browser = True
+    i = 0
+    while i < len(argv):
+        name, eq, val = argv[i].partition("=")
+        if name in _VALUE_FLAGS:
+            if not eq:
+                i += 1
+                if i >= len(argv):
+                    return _build_parser().parse_args(argv)  # エラー表示は argparse に任せる
+                val = argv[i]
+            setattr(ns, _VALUE_FLAGS[name], val)
+        elif name in _BOOL_FLAGS and not eq:
+            setattr(ns, _BOOL_FLAGS[name], True)
+        elif name in _FALSE_FLAGS and not eq:
+            setattr(ns, _FALSE_FLAGS[name], False)
+        else:
+            return _build_parser().parse_args(argv)  # 未知のフラグも同様
+        i += 1
+    return ns
+
+
+def main():
+    args = _parse_args(sys.argv[1:])
+    if args.profile:
+        # snakeviz 等で開ける .prof を書く（遅いのがスクレイプか dump かの切り分け用）
+        import cProfile
+
+        pr = cProfile.Profile()
+        pr.enable()
+        try:
+            _run(args)
+        finally:
+            pr.disable()
+            pr.dump_stats(args.profile)
+    else:
+        _run(args)
+
+
+def _run(args):
+    # 出力先ゼロでスクレイプだけ走らせても丸ごと無駄になるので先に落とす
+    if not (args.out or args.horses or args.jockeys):
+        _build_parser().error("at least one of --out/--horses/--jockeys is required")
 
     html_path = Path(args.html) if args.html else None
-    race_data = scrape_race_data(
+    scrape_kwargs = dict(
         target_day=args.target_day,
         source_url=args.url,
         html_path=html_path,
@@ -819,24 +1694,62 @@ def main():
         all_venues=args.all_venues,
         fetch_horse_detail=args.fetch_horse_detail,
     )
-    race_data["generated_at"] = None
+    if args.all_venues:
+        # 会場ページを並行で開けるよう async 版で回す
+        # （内部で 1 つのブラウザを起動し全会場で共有する）
+        race_data = asyncio.run(scrape_race_data_async(**scrape_kwargs))
+    elif args.playwright and args.reuse_browser:
+        # ブラウザを 1 回だけ起動して全ページで使い回す
+        # （ページ毎のコールドスタート ~800ms × N を 1 回に圧縮）
+        from playwright.sync_api import sync_playwright
 
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            try:
+                race_data = scrape_race_data(**scrape_kwargs, browser=browser)
+            finally:
+                browser.close()
+    else:
+        race_data = scrape_race_data(**scrape_kwargs)
+
+    # 出力先ディレクトリは重複を除いて一度だけ作る
+    for p in {Path(x).parent for x in (args.out, args.horses, args.jockeys) if x}:
+        p.mkdir(parents=True, exist_ok=True)
+
+    # 派生 JSON を先に作ってから race_data 本体を破壊的に sanitize する。
+    # コピー版 sanitize_race_data と違い中間構造を作らないのでピークメモリが半分で済む。
+    tasks: List[tuple] = []
+    if args.horses and args.jockeys:
+        horse_data, jockey_data = build_horse_and_jockey(race_data)
+        tasks.append((_dump, args.horses, horse_data))
+        tasks.append((_dump, args.jockeys, jockey_data))
+    elif args.horses:
+        tasks.append((_dump, args.horses, build_horse_json(race_data)))
+    elif args.jockeys:
+        tasks.append((_dump, args.jockeys, build_jockey_json(race_data)))
     if args.out:
-        Path(args.out).parent.mkdir(parents=True, exist_ok=True)
-        with open(args.out, "w", encoding="utf-8") as f:
-            json.dump(sanitize_race_data(race_data), f, ensure_ascii=False, indent=2)
-
-    if args.horses:
-        horse_data = build_horse_json(race_data)
-        Path(args.horses).parent.mkdir(parents=True, exist_ok=True)
-        with open(args.horses, "w", encoding="utf-8") as f:
-            json.dump(horse_data, f, ensure_ascii=False, indent=2)
-
-    if args.jockeys:
-        jockey_data = build_jockey_json(race_data)
-        Path(args.jockeys).parent.mkdir(parents=True, exist_ok=True)
-        with open(args.jockeys, "w", encoding="utf-8") as f:
-            json.dump(jockey_data, f, ensure_ascii=False, indent=2)
+        sanitize_race_data_in_place(race_data)
+        # フラグは出力 JSON に混ぜない
+        race_data.pop("_sanitized", None)
+        # race 本体は最大の成果物なのでストリーム書き出し
+        tasks.append((_stream_dump_race, args.out, race_data))
+
+    # まず全成果物を tmp に書き切り、最後に os.replace をまとめて行う。
+    # どれかの serialize が途中で落ちても既存ファイルは一切置き換わらない。
+    if len(tasks) > 1:
+        # serialize は orjson の C 側、write は I/O 待ちで、どちらも GIL を離す
+        with ThreadPoolExecutor(max_workers=len(tasks)) as ex:
+            tmps = list(ex.map(lambda t: t[0](t[1], t[2], pretty=args.pretty), tasks))
+    elif tasks:
+        writer, path, obj = tasks[0]
+        tmps = [writer(path, obj, pretty=args.pretty)]
+    else:
+        tmps = []
+
+    for tmp, (_, dst, _) in zip(tmps, tasks):
+        os.replace(tmp, dst)
+    if args.fsync and tmps:
+        os.sync()
 
 
 if __name__ == "__main__":